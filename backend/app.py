@@ -3,13 +3,45 @@
 
 from __future__ import annotations
 
+import ast
+import ctypes
+import itertools
+import linecache
+import operator
 import os
-from functools import lru_cache
+import re
+import sqlite3
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import closing, contextmanager
+from fractions import Fraction
+from functools import lru_cache, wraps
 from typing import Any
 
-from flask import Flask, jsonify, request
-from sympy import Eq, latex, solve, sympify
+import numpy as np
+import orjson
+import symengine
+from flask import Flask, Response, request
+from symengine.lib.symengine_wrapper import EmptySet, FiniteSet, have_llvm
+from symengine.lib.symengine_wrapper import solve as symengine_solve
+from sympy import (
+    Eq,
+    Expr,
+    Float,
+    Integer,
+    Poly,
+    Pow,
+    latex,
+    nan,
+    oo,
+    solve,
+    sympify,
+    zoo,
+)
+from sympy.core.cache import clear_cache
 from sympy.core.symbol import Symbol
+from sympy.core.sorting import default_sort_key
+from sympy.polys.polyerrors import PolynomialError
 from sympy.parsing.sympy_parser import (
     implicit_multiplication_application,
     parse_expr,
@@ -21,73 +53,441 @@ TRANSFORMATIONS = standard_transformations + (
     implicit_multiplication_application,
 )
 
+# A space next to an operator can go; a space between two operands cannot,
+# since it means implicit multiplication ("2 3" is 6, "sin x" is sin(x)).
+OPERATOR_SPACE_RE = re.compile(r"(?<=[\w.)]) (?=[-+*/=,)])|(?<=[-+*/=,(]) (?=[\w.(+-])")
+
+# SymPy's internal caches and linecache only ever grow in a long-running
+# process. Clearing them every N requests bounds RSS at the cost of SymPy
+# re-deriving a few cached facts; our own LRU caches are not affected.
+CACHE_CLEAR_INTERVAL = 1000
+
+# Solved in create_app so the first requests for common inputs hit the cache.
+# Already normalized (see _normalize_equation).
+WARMUP_EQUATIONS = (
+    "1+1",
+    "x+1=2",
+    "2*x+3=7",
+    "x/2=5",
+    "x**2=4",
+    "x**2-4=0",
+    "x**2-5*x+6=0",
+)
+
+# A plain decimal literal, e.g. the right-hand side of "x**2 - 4 = 0".
+NUMBER_RE = re.compile(r"-?(?:0|[1-9][0-9]*)(\.[0-9]+)?")
+
+# Any decimal point next to a digit, i.e. a float literal somewhere in the input.
+FLOAT_RE = re.compile(r"[0-9]\.|\.[0-9]")
+
+# Integer arithmetic that can be evaluated exactly without SymPy. No "." so
+# floats keep SymPy's formatting and no names so nothing can be looked up.
+ARITHMETIC_RE = re.compile(r"^[0-9\s+\-*/()]+$")
+_BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+_UNARY_OPS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+# SymEngine only gets polynomials up to this degree: higher-degree closed
+# forms print worse than SymPy's, and larger powers would expand in C++
+# code that the solve deadline cannot interrupt.
+SYMENGINE_MAX_DEGREE = 2
+
+# SymEngine wheels usually ship the LLVM JIT; the pure-Python lambda backend
+# is the fallback when they don't.
+LAMBDIFY_BACKEND = "llvm" if have_llvm else "lambda"
+
+# Wall-clock budget in seconds for solving one equation.
+SOLVE_TIMEOUT = 2.0
+
+# SQLite file backing the solver cache across restarts and workers; unset
+# disables the disk tier. Bump CACHE_VERSION whenever cached values change shape.
+SOLVER_CACHE_PATH = os.environ.get("SOLVER_CACHE_PATH")
+SOLVER_CACHE_SIZE = 10_000
+CACHE_VERSION = 7
+
+
+def disk_memoize(
+    path: str | None, max_entries: int = SOLVER_CACHE_SIZE
+) -> Callable[[Callable[[str], bytes]], Callable[[str], bytes]]:
+    """Memoize a one-string-argument function returning bytes in a SQLite file.
+
+    Keeps at most about max_entries rows, evicting the oldest writes first,
+    and drops rows from other CACHE_VERSIONs when the table is opened. A
+    falsy path returns the function unchanged.
+    """
+
+    def decorator(func: Callable[[str], bytes]) -> Callable[[str], bytes]:
+        if not path:
+            return func
+
+        with closing(sqlite3.connect(path)) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB)"
+            )
+            conn.execute(
+                "DELETE FROM cache WHERE key NOT LIKE ?", (f"{CACHE_VERSION}:%",)
+            )
+
+        local = threading.local()
+
+        def connect() -> sqlite3.Connection:
+            # One connection per thread; the pid check discards connections
+            # inherited from a preloading gunicorn master across fork.
+            if getattr(local, "pid", None) != os.getpid():
+                local.conn = sqlite3.connect(path, timeout=5)
+                local.pid = os.getpid()
+            return local.conn
+
+        @wraps(func)
+        def wrapper(arg: str) -> bytes:
+            key = f"{CACHE_VERSION}:{arg}"
+            conn = connect()
+            row = conn.execute(
+                "SELECT value FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                return row[0]
+
+            value = func(arg)
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)",
+                    (key, value),
+                )
+                # REPLACE assigns a fresh rowid, so rowids order rows by write.
+                conn.execute(
+                    "DELETE FROM cache WHERE rowid <= "
+                    "(SELECT MAX(rowid) FROM cache) - ?",
+                    (max_entries,),
+                )
+            return value
+
+        return wrapper
+
+    return decorator
+
 
 @lru_cache(maxsize=256)
-def parse_equation(equation_str: str) -> tuple[Any, frozenset[Symbol]]:
+def parse_equation(equation_str: str) -> tuple[Any, tuple[Symbol, ...]]:
     """Parse equation string and return sympy expression with variables.
 
+    Variables come back sorted by name, so the sort is paid once per string.
+
     Cached for performance on repeated queries.
     """
     expr = parse_expr(equation_str, transformations=TRANSFORMATIONS)
-    return expr, frozenset(expr.free_symbols)
+    return expr, tuple(sorted(expr.free_symbols, key=lambda s: s.name))
 
 
-@lru_cache(maxsize=128)
-def _solve_cached(
-    equation_str: str,
-) -> tuple[str, str | None]:
-    if "=" in equation_str:
-        left, right = equation_str.split("=", 1)
-        left_expr, left_symbols = parse_equation(left.strip())
-        right_expr, right_symbols = parse_equation(right.strip())
-        expr = Eq(left_expr, right_expr)
-        free_symbols = left_symbols | right_symbols
+@contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """Raise TimeoutError in the calling thread if the block overruns.
+
+    A watchdog timer injects the exception with PyThreadState_SetAsyncExc
+    rather than SIGALRM, which only works on the main thread and so not in
+    gunicorn's threaded workers. It is delivered between bytecodes, so a
+    long call into C code is only interrupted once it returns. That includes
+    SymEngine: the SymEngine stage is not covered by the deadline and relies
+    on _solve_symengine only passing it small polynomials.
+    """
+    thread_id = threading.get_ident()
+    lock = threading.Lock()
+    finished = False
+
+    def interrupt() -> None:
+        with lock:
+            if not finished:
+                ctypes.pythonapi.PyThreadState_SetAsyncExc(
+                    ctypes.c_ulong(thread_id), ctypes.py_object(TimeoutError)
+                )
+
+    timer = threading.Timer(seconds, interrupt)
+    timer.daemon = True
+    timer.start()
+    try:
+        yield
+    finally:
+        with lock:
+            finished = True
+        timer.cancel()
+
+
+def _eval_arithmetic_node(node: ast.AST) -> Fraction:
+    if isinstance(node, ast.Constant) and type(node.value) is int:
+        return Fraction(node.value)
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+        left = _eval_arithmetic_node(node.left)
+        right = _eval_arithmetic_node(node.right)
+        return _BINARY_OPS[type(node.op)](left, right)
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        return _UNARY_OPS[type(node.op)](_eval_arithmetic_node(node.operand))
+    raise ValueError(f"Unsupported arithmetic node: {ast.dump(node)}")
+
+
+def _solve_arithmetic(equation_str: str) -> tuple[str, str] | None:
+    """Evaluate plain integer arithmetic exactly, bypassing SymPy.
+
+    Returns None when the input is not +, -, *, / over integer literals (or
+    divides by zero) so the caller falls through to the symbolic path.
+    Results are formatted the way SymPy prints Integer and Rational.
+    """
+    if not ARITHMETIC_RE.match(equation_str):
+        return None
+    try:
+        tree = ast.parse(equation_str.strip(), mode="eval")
+        result = _eval_arithmetic_node(tree.body)
+        numerator, denominator = result.numerator, result.denominator
+        if denominator == 1:
+            return str(numerator), str(numerator)
+        sign = "- " if numerator < 0 else ""
+        latex_result = f"{sign}\\frac{{{abs(numerator)}}}{{{denominator}}}"
+        return f"{numerator}/{denominator}", latex_result
+    except (SyntaxError, ValueError, ZeroDivisionError, RecursionError):
+        return None
+
+
+def _format_solutions(variable: Symbol, solutions: list[Any]) -> tuple[str, str]:
+    formatted = ", ".join(str(sol) for sol in solutions)
+    latex_sols = ", ".join(latex(sol) for sol in solutions)
+    return f"{variable} = {formatted}", f"{latex(variable)} = {latex_sols}"
+
+
+def _parse_problem(equation_str: str) -> tuple[Any, tuple[Symbol, ...], bool]:
+    """Parse input into (expr, variables, is_difference).
+
+    When is_difference is True, expr is lhs - rhs and is solved for zero;
+    otherwise it is the plain expression or, for equations the difference
+    would misrepresent, Eq(lhs, rhs). Shared by the SymEngine and SymPy
+    paths so both read input the same way.
+    """
+    if "=" not in equation_str:
+        expr, symbols = parse_equation(equation_str)
+        return expr, symbols, False
+
+    # lhs = rhs has the same solutions as lhs - rhs = 0, which needs a
+    # single parse and a single parse_equation cache entry.
+    left, right = (side.strip() for side in equation_str.split("=", 1))
+    number = NUMBER_RE.fullmatch(right)
+    if number:
+        # "lhs = N" needs no parse of N; lhs gets its own cache entry. A
+        # float zero such as "0.0" vanishes here and is caught by the Eq
+        # fallback below.
+        expr, symbols = parse_equation(left)
+        if right != "0":
+            expr = expr - (Float(right) if number.group(1) else Integer(right))
     else:
-        expr, free_symbols = parse_equation(equation_str)
+        expr, symbols = parse_equation(f"({left})-({right})")
+
+    # The difference drops a float zero (x - 0.0 is x, so x = 0.0 would
+    # answer 0 instead of 0.0) and mangles infinities (oo - oo is nan).
+    # Those rare inputs keep the Eq(lhs, rhs) form.
+    if expr.has(nan, zoo, oo, -oo) or (
+        FLOAT_RE.search(equation_str) and not expr.has(Float)
+    ):
+        left_expr, left_symbols = parse_equation(left)
+        right_expr, right_symbols = parse_equation(right)
+        symbols = tuple(
+            sorted(set(left_symbols) | set(right_symbols), key=lambda s: s.name)
+        )
+        return Eq(left_expr, right_expr), symbols, False
+    return expr, symbols, True
 
-    if not free_symbols:
-        result = sympify(expr)
+
+def _linear_root(poly: Poly) -> list[Any] | None:
+    """Return [-b / a] for a finite degree-one poly a * x + b, else None."""
+    if poly.degree() != 1:
+        return None
+    a, b = poly.all_coeffs()
+    if not (a.is_finite and b.is_finite):
+        return None
+    return [-b / a]
+
+
+def _solve_linear(expr: Any, variable: Symbol) -> list[Any] | None:
+    """Solve a * variable + b = 0 as -b / a without going through solve()."""
+    if not isinstance(expr, Expr):
+        return None
+    try:
+        poly = Poly(expr, variable)
+    except PolynomialError:
+        return None
+    return _linear_root(poly)
+
+
+def _solve_symengine(equation_str: str) -> tuple[str, str | None]:
+    """Solve a low-degree rational polynomial equation with SymEngine.
+
+    Parsing is shared with the SymPy path. Anything else (other functions,
+    radicals, float or symbolic coefficients, degree above
+    SYMENGINE_MAX_DEGREE, several variables) raises NotImplementedError so
+    the caller falls back to SymPy. Linear input is answered in closed form
+    from the same Poly. Exponents are checked before Poly is
+    built so SymEngine's C++ code, which the solve deadline cannot
+    interrupt, never sees a huge expansion.
+    """
+    expr, symbols, _ = _parse_problem(equation_str)
+    if not isinstance(expr, Expr):
+        raise NotImplementedError("SymEngine path only handles expressions")
+    if len(symbols) != 1:
+        raise NotImplementedError("SymEngine path only handles one variable")
+
+    (variable,) = symbols
+    if any(
+        not (power.exp.is_Integer and abs(power.exp) <= SYMENGINE_MAX_DEGREE)
+        for power in expr.atoms(Pow)
+        if power.has(variable)
+    ):
+        raise NotImplementedError("SymEngine path only handles low powers")
+    try:
+        poly = Poly(expr, variable)
+    except PolynomialError:
+        raise NotImplementedError("SymEngine path only handles polynomials")
+    if not (poly.domain.is_ZZ or poly.domain.is_QQ):
+        raise NotImplementedError("SymEngine path only handles rational coefficients")
+    if not 1 <= poly.degree() <= SYMENGINE_MAX_DEGREE:
+        raise NotImplementedError("SymEngine path only handles low degrees")
+
+    linear = _linear_root(poly)
+    if linear is not None:
+        # The closed form is cheaper than a round trip through SymEngine.
+        return _format_solutions(variable, linear)
+
+    solutions = symengine_solve(
+        symengine.sympify(poly.as_expr()), symengine.Symbol(variable.name)
+    )
+    if not isinstance(solutions, FiniteSet) or isinstance(solutions, EmptySet):
+        raise NotImplementedError(f"Unsupported solution set: {solutions}")
+
+    sympy_solutions = sorted(
+        (sympify(sol) for sol in solutions.args), key=default_sort_key
+    )
+    return _format_solutions(variable, sympy_solutions)
+
+
+def _solve_sympy(equation_str: str) -> tuple[str, str | None]:
+    expr, symbols, is_difference = _parse_problem(equation_str)
+
+    if not symbols:
+        if is_difference and any(
+            parse_equation(side.strip())[1] for side in equation_str.split("=", 1)
+        ):
+            # The variables cancelled out (x = x, x + 1 = x + 2); report it the
+            # way solving Eq(lhs, rhs) for them does.
+            return "No solution found", None
+        result = Eq(expr, 0) if is_difference else sympify(expr)
         result_str = str(result)
         return result_str, latex(result)
 
-    symbols_list = sorted(free_symbols, key=lambda s: str(s))
-    variable = symbols_list[0] if len(symbols_list) == 1 else None
+    variable = symbols[0] if len(symbols) == 1 else None
 
     if variable:
-        solutions = solve(expr, variable, dict=False)
+        solutions = _solve_linear(expr, variable)
+        if solutions is None:
+            solutions = solve(expr, variable, dict=False)
+        if isinstance(solutions, list):
+            # Solving lhs - rhs lets zoo through where solving Eq(lhs, rhs)
+            # would have rejected it (x = 1/0).
+            solutions = [sol for sol in solutions if sol is not zoo]
         if not solutions:
             return "No solution found", None
         if isinstance(solutions, list):
-            formatted = ", ".join(str(sol) for sol in solutions)
-            latex_sols = ", ".join(latex(sol) for sol in solutions)
-            latex_result = f"{latex(variable)} = {latex_sols}"
-            return f"{variable} = {formatted}", latex_result
+            return _format_solutions(variable, solutions)
         latex_result = f"{latex(variable)} = {latex(solutions)}"
         return f"{variable} = {solutions}", latex_result
     else:
-        solutions = solve(expr, free_symbols, dict=True)
+        solutions = solve(expr, symbols, dict=True)
         if not solutions:
             return "No solution found", None
-        return f"{solutions}", latex(solutions)
+        formatted = ", ".join(
+            "{" + ", ".join(f"{k}: {v}" for k, v in sol.items()) + "}"
+            for sol in solutions
+        )
+        return f"[{formatted}]", latex(solutions)
 
 
-def solve_equation(
+def _solve_backend(equation_str: str) -> tuple[str, str | None]:
+    """Try SymEngine first and fall back to SymPy when it is not enough."""
+    arithmetic = _solve_arithmetic(equation_str)
+    if arithmetic is not None:
+        return arithmetic
+    try:
+        return _solve_symengine(equation_str)
+    except (NotImplementedError, RuntimeError):
+        return _solve_sympy(equation_str)
+
+
+@lru_cache(maxsize=128)
+@disk_memoize(SOLVER_CACHE_PATH)
+def _solve_cached(
     equation_str: str,
-) -> dict[str, str | list[str]]:
+) -> bytes:
+    """Solve and serialize the JSON response body once per equation."""
+    with deadline(SOLVE_TIMEOUT):
+        result_text, result_latex = _solve_backend(equation_str)
+    return orjson.dumps({"result": result_text, "latex": result_latex or result_text})
+
+
+@lru_cache(maxsize=64)
+def _compile_lambda(expr_str: str, var: str) -> Callable[[np.ndarray], np.ndarray]:
+    """Compile an expression of one variable into a vectorized function.
+
+    Cached so the JIT cost is paid once per expression, not per request.
+    """
+    expr, _ = parse_equation(expr_str)
+    return symengine.Lambdify(
+        [symengine.Symbol(var)], symengine.sympify(expr), backend=LAMBDIFY_BACKEND
+    )
+
+
+def _normalize_equation(equation_str: str) -> str:
+    """Canonicalize spacing so equivalent inputs share one cache entry."""
+    # isprintable() is False for every whitespace character except " ", so
+    # this skips the split/join and regex passes for whitespace-free input.
+    if equation_str.isprintable() and " " not in equation_str:
+        return equation_str
+    return OPERATOR_SPACE_RE.sub("", " ".join(equation_str.split()))
+
+
+def ojson(obj: Any, status: int = 200) -> Response:
+    """Serialize obj with orjson into a JSON response (jsonify replacement)."""
+    return Response(orjson.dumps(obj), status=status, mimetype="application/json")
+
+
+def _cached_response(equation_str: str) -> tuple[bytes, int]:
+    """Return the serialized /solve response body and its status code."""
     try:
-        result_text, result_latex = _solve_cached(equation_str)
-        return {
-            "result": result_text,
-            "latex": result_latex or result_text,
-        }
+        return _solve_cached(_normalize_equation(equation_str)), 200
+    except TimeoutError:
+        return orjson.dumps({"error": "Equation too complex"}), 400
     except (ValueError, SyntaxError, TypeError) as e:
-        return {"error": f"Invalid equation format: {str(e)}"}
+        return orjson.dumps({"error": f"Invalid equation format: {str(e)}"}), 400
     except Exception as e:
-        return {"error": f"Error solving equation: {str(e)}"}
+        return orjson.dumps({"error": f"Error solving equation: {str(e)}"}), 400
+
+
+def solve_equation(
+    equation_str: str,
+) -> dict[str, str | list[str]]:
+    body, _ = _cached_response(equation_str)
+    return orjson.loads(body)
 
 
 def create_app() -> Flask:
     app = Flask(__name__)
+    for equation in WARMUP_EQUATIONS:
+        _solve_cached(equation)
+
+    request_counter = itertools.count(1)
+
+    @app.before_request
+    def clear_sympy_caches() -> None:
+        if next(request_counter) % CACHE_CLEAR_INTERVAL == 0:
+            clear_cache()
+            linecache.clearcache()
 
     @app.after_request
     def add_cors_headers(response):  # type: ignore[override]
@@ -100,15 +500,57 @@ def create_app() -> Flask:
     def solve_endpoint():
         equation = (request.args.get("equation") or "").strip()
         if not equation:
-            return jsonify({"error": "Missing 'equation' query parameter"}), 400
+            return ojson({"error": "Missing 'equation' query parameter"}, 400)
+
+        body, status_code = _cached_response(equation)
+        return Response(body, status=status_code, mimetype="application/json")
+
+    @app.get("/evaluate")
+    def evaluate_endpoint():
+        expr = (request.args.get("expr") or "").strip()
+        xs = (request.args.get("xs") or "").strip()
+        var = (request.args.get("var") or "x").strip()
+        if not expr or not xs:
+            return ojson({"error": "Missing 'expr' or 'xs' query parameter"}, 400)
+
+        try:
+            values = np.array(xs.split(","), dtype=float)
+        except ValueError:
+            return ojson({"error": "'xs' must be comma-separated numbers"}, 400)
+        try:
+            func = _compile_lambda(_normalize_equation(expr), var)
+        except Exception as e:
+            return ojson({"error": f"Invalid expression: {str(e)}"}, 400)
+        return ojson({"result": np.atleast_1d(func(values)).tolist()})
+
+    @app.get("/eval")
+    def eval_endpoint():
+        expr = (request.args.get("expr") or "").strip()
+        if not expr:
+            return ojson({"error": "Missing 'expr' query parameter"}, 400)
+
+        try:
+            expr = _normalize_equation(expr)
+            _, symbols = parse_equation(expr)
+        except Exception as e:
+            return ojson({"error": f"Invalid expression: {str(e)}"}, 400)
+        if len(symbols) != 1:
+            return ojson({"error": "Expression must have exactly one variable"}, 400)
 
-        result = solve_equation(equation)
-        status_code = 400 if "error" in result else 200
-        return jsonify(result), status_code
+        var = symbols[0].name
+        try:
+            value = float(request.args.get(var, ""))
+        except ValueError:
+            return ojson({"error": f"'{var}' must be given as a number"}, 400)
+        try:
+            result = float(_compile_lambda(expr, var)(value))
+        except Exception as e:
+            return ojson({"error": f"Invalid expression: {str(e)}"}, 400)
+        return ojson({"result": result})
 
     @app.route("/", methods=["GET"])
     def root():
-        return jsonify({"message": "Equation API. Try /solve?equation=1+1"})
+        return ojson({"message": "Equation API. Try /solve?equation=1+1"})
 
     return app
 
@@ -0,0 +1,11 @@
+"""ASGI entry point for serving the equation API with uvicorn.
+
+Run with: uvicorn --workers 4 --loop uvloop asgi:app
+(install the server with `uv sync --group asgi`).
+"""
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import create_app
+
+app = WsgiToAsgi(create_app())
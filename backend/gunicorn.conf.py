@@ -0,0 +1,18 @@
+"""Gunicorn settings for serving the equation API.
+
+Run with: gunicorn -c gunicorn.conf.py 'app:create_app()'
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = 4
+
+# Live reload for local development (docker-compose sets GUNICORN_RELOAD=1).
+reload = os.environ.get("GUNICORN_RELOAD") == "1"
+# Import the app once in the master so workers share its memory copy-on-write.
+# Preloaded code is never re-imported, so it is incompatible with reload.
+preload_app = not reload
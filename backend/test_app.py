@@ -2,9 +2,28 @@
 
 from __future__ import annotations
 
-import pytest
+import sqlite3
+import threading
+import time
+from contextlib import closing
 
-from app import create_app, parse_equation, solve_equation, _solve_cached
+import pytest
+from sympy import Symbol
+
+from app import (
+    WARMUP_EQUATIONS,
+    _normalize_equation,
+    _solve_arithmetic,
+    _solve_cached,
+    _solve_linear,
+    _solve_symengine,
+    _solve_sympy,
+    create_app,
+    deadline,
+    disk_memoize,
+    parse_equation,
+    solve_equation,
+)
 
 
 @pytest.fixture(autouse=True)
@@ -40,6 +59,11 @@ class TestParseEquation:
         expr, symbols = parse_equation("x + y + z")
         assert len(symbols) == 3
 
+    def test_symbols_sorted(self):
+        """Test variables are returned sorted by name."""
+        expr, symbols = parse_equation("z + x + y")
+        assert [s.name for s in symbols] == ["x", "y", "z"]
+
     def test_implicit_multiplication(self):
         """Test implicit multiplication parsing."""
         expr, symbols = parse_equation("2x")
@@ -88,6 +112,42 @@ class TestSolveEquation:
         result = solve_equation("x + 1 = x + 2")
         assert "result" in result
 
+    def test_symbols_cancel(self):
+        """Test equations whose variables cancel keep the Eq-based output."""
+        assert solve_equation("x = x")["result"] == "No solution found"
+        assert solve_equation("x + 1 = x + 2")["result"] == "No solution found"
+        assert solve_equation("2 = 3")["result"] == "False"
+
+    def test_float_zero_and_infinite_sides(self):
+        """Test equations lhs - rhs would misrepresent keep Eq's output."""
+        assert solve_equation("x = 0.0")["result"] == "x = 0.0"
+        assert solve_equation("2*x = 0.0")["result"] == "x = 0.0"
+        assert solve_equation("x**2 = 0.0")["result"] == "x = 0.0"
+        assert solve_equation("oo = oo")["result"] == "True"
+
+    def test_timeout(self, monkeypatch):
+        """Test a solve exceeding SOLVE_TIMEOUT reports an error."""
+
+        def spin(equation_str):
+            while True:
+                pass
+
+        monkeypatch.setattr("app.SOLVE_TIMEOUT", 0.05)
+        monkeypatch.setattr("app._solve_backend", spin)
+        assert solve_equation("x = 1") == {"error": "Equation too complex"}
+
+    def test_infinite_constant(self):
+        """Test an infinite term yields no solution."""
+        assert solve_equation("x = 1/0")["result"] == "No solution found"
+
+    def test_large_exponent_rejected_quickly(self, monkeypatch):
+        """Test a huge power stays out of SymEngine and hits the deadline."""
+        monkeypatch.setattr("app.SOLVE_TIMEOUT", 0.2)
+        start = time.monotonic()
+        result = solve_equation("(x + 1)**30000 = 0")
+        assert result == {"error": "Equation too complex"}
+        assert time.monotonic() - start < 5
+
     def test_invalid_syntax(self):
         """Test invalid equation syntax."""
         result = solve_equation("x +* 2")
@@ -117,6 +177,7 @@ class TestSolveEquation:
         """Test equation with multiple variables."""
         result = solve_equation("x + y = 10")
         assert "result" in result
+        assert result["result"] == "[{x: 10 - y}]"
 
     def test_fraction(self):
         """Test equation with fractions."""
@@ -124,6 +185,220 @@ class TestSolveEquation:
         assert "result" in result
 
 
+class TestDeadline:
+    """Test the solve deadline context manager."""
+
+    def test_interrupts_long_block(self):
+        """Test an overrunning block raises TimeoutError."""
+        with pytest.raises(TimeoutError):
+            with deadline(0.05):
+                while True:
+                    pass
+
+    def test_fast_block_unaffected(self):
+        """Test a block finishing in time is not interrupted later."""
+        with deadline(0.05):
+            pass
+        time.sleep(0.1)
+
+    def test_worker_thread(self):
+        """Test the deadline also works off the main thread."""
+        raised = []
+
+        def worker():
+            try:
+                with deadline(0.05):
+                    while True:
+                        pass
+            except TimeoutError:
+                raised.append(True)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join(timeout=5)
+        assert raised == [True]
+
+
+class TestNormalizeEquation:
+    """Test cache key normalization."""
+
+    def test_operator_spacing_removed(self):
+        """Test spacing around operators collapses to one key."""
+        for equation in ("2*x+3=7", "2 * x + 3 = 7", " 2*x  +3 =\t7\n"):
+            assert _normalize_equation(equation) == "2*x+3=7"
+
+    def test_operand_spacing_kept(self):
+        """Test spaces meaning implicit multiplication survive."""
+        assert _normalize_equation("2  3") == "2 3"
+        assert _normalize_equation("sin x = 0") == "sin x=0"
+
+    def test_tokens_not_merged(self):
+        """Test operators separated by spaces are not fused."""
+        assert _normalize_equation("2 * * 3") == "2* *3"
+        assert _normalize_equation("x = - 2") == "x=-2"
+
+
+class TestArithmeticFastPath:
+    """Test the SymPy-free integer arithmetic path."""
+
+    def test_integer_result(self):
+        """Test integer arithmetic is evaluated directly."""
+        assert _solve_arithmetic("(1 + 2) * 3") == ("9", "9")
+
+    def test_rational_result(self):
+        """Test division stays exact and matches SymPy's printing."""
+        assert _solve_arithmetic("-10/4") == ("-5/2", "- \\frac{5}{2}")
+
+    def test_falls_through(self):
+        """Test unsupported input is left to the symbolic path."""
+        for equation in ("2**3", "1.5 + 1", "2(3)", "1/0", "x + 1", "2 + 2 = 4"):
+            assert _solve_arithmetic(equation) is None
+
+
+class TestSolveSympy:
+    """Test the SymPy solving path directly."""
+
+    def test_numeric_rhs_parses_lhs_only(self):
+        """Test "lhs = N" parses only the left-hand side."""
+        assert _solve_sympy("x**2-4=0") == ("x = -2, 2", "x = -2, 2")
+        assert _solve_sympy("x/2=-2.5") == ("x = -5.00000000000000", "x = -5.0")
+        assert parse_equation.cache_info().currsize == 2
+
+    def test_float_zero_rhs(self):
+        """Test a float zero literal on the right keeps its float answer."""
+        assert _solve_sympy("x=0.0") == ("x = 0.0", "x = 0.0")
+        assert _solve_sympy("x**2=-0.0") == ("x = 0.0", "x = 0.0")
+
+    def test_expression_rhs(self):
+        """Test a non-numeric right-hand side is parsed with the left."""
+        assert _solve_sympy("2x=x+3") == ("x = 3", "x = 3")
+
+
+class TestLinearFastPath:
+    """Test the closed-form solver for linear equations."""
+
+    def test_linear(self):
+        """Test degree-one polynomials are solved directly."""
+        x = Symbol("x")
+        expr, _ = parse_equation("(x/3 + x/2)-(5)")
+        assert _solve_linear(expr, x) == [6]
+
+    def test_rational_linear_skips_symengine(self, monkeypatch):
+        """Test rational linear equations take the closed-form path."""
+
+        def fail(*args):
+            raise AssertionError("symengine_solve called for linear input")
+
+        monkeypatch.setattr("app.symengine_solve", fail)
+        for equation, expected in (
+            ("2*x+3=7", "x = 2"),
+            ("x/2=5", "x = 10"),
+            ("3*x-1=2*x+5", "x = 6"),
+        ):
+            assert solve_equation(equation)["result"] == expected
+
+    def test_not_linear(self):
+        """Test other equations are left to sympy.solve."""
+        x = Symbol("x")
+        for equation in ("x**2 - 4", "sin(x)", "1/x - 2", "x - 1/0"):
+            expr, _ = parse_equation(equation)
+            assert _solve_linear(expr, x) is None
+
+
+class TestSymEngineBackend:
+    """Test the SymEngine fast path and its SymPy fallback triggers."""
+
+    def test_polynomial(self):
+        """Test SymEngine solves polynomials and orders roots."""
+        assert _solve_symengine("x**2 = 16") == ("x = -4, 4", "x = -4, 4")
+
+    def test_empty_set_deferred(self):
+        """Test an empty solution set is left to SymPy to confirm."""
+        with pytest.raises(NotImplementedError):
+            _solve_symengine("1/x = 0")
+
+    def test_radicals_deferred(self):
+        """Test non-polynomial equations are solved by SymPy."""
+        for equation in ("sqrt(x) = 2", "sqrt(x) + x = 6", "x**2.0 = 4"):
+            with pytest.raises(NotImplementedError):
+                _solve_symengine(equation)
+        assert solve_equation("sqrt(x) = 2")["result"] == "x = 4"
+        assert solve_equation("sqrt(x) + x = 6")["result"] == "x = 4"
+
+    def test_high_degree_deferred(self):
+        """Test powers above SYMENGINE_MAX_DEGREE are solved by SymPy."""
+        for equation in ("x**3 = 2", "(x + 1)**30000 = 0"):
+            with pytest.raises(NotImplementedError):
+                _solve_symengine(equation)
+
+    def test_empty_right_hand_side(self):
+        """Test "lhs =" is an error rather than "lhs = 0"."""
+        assert "error" in solve_equation("x + 1 =")
+
+    def test_multiple_variables_not_supported(self):
+        """Test multivariate input is left to SymPy."""
+        with pytest.raises(NotImplementedError):
+            _solve_symengine("x + y = 10")
+
+    def test_transcendental_not_supported(self):
+        """Test non-finite solution sets are left to SymPy."""
+        with pytest.raises(NotImplementedError):
+            _solve_symengine("sin(x) = 0")
+
+
+class TestDiskMemoize:
+    """Test the SQLite-backed memoization layer."""
+
+    def test_persists_across_instances(self, tmp_path):
+        """Test a second wrapper over the same file reuses stored values."""
+        path = str(tmp_path / "cache.db")
+        calls = []
+
+        def solver(equation_str):
+            calls.append(equation_str)
+            return equation_str.upper().encode()
+
+        first = disk_memoize(path)(solver)
+        second = disk_memoize(path)(solver)
+        assert first("x + 1") == b"X + 1"
+        assert second("x + 1") == b"X + 1"
+        assert calls == ["x + 1"]
+
+    def test_evicts_oldest_entries(self, tmp_path):
+        """Test the table is capped at max_entries, dropping old writes."""
+        path = str(tmp_path / "cache.db")
+        calls = []
+
+        def solver(equation_str):
+            calls.append(equation_str)
+            return equation_str.encode()
+
+        cached = disk_memoize(path, max_entries=2)(solver)
+        for equation in ("a", "b", "c", "a"):
+            cached(equation)
+        assert calls == ["a", "b", "c", "a"]
+        with closing(sqlite3.connect(path)) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM cache").fetchone() == (2,)
+
+    def test_drops_other_versions(self, tmp_path):
+        """Test rows from older CACHE_VERSIONs are deleted on open."""
+        path = str(tmp_path / "cache.db")
+        disk_memoize(path)(lambda equation_str: b"")
+        with closing(sqlite3.connect(path)) as conn, conn:
+            conn.execute("INSERT INTO cache VALUES ('0:x', x'00')")
+        disk_memoize(path)(lambda equation_str: b"")
+        with closing(sqlite3.connect(path)) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM cache").fetchone() == (0,)
+
+    def test_disabled_without_path(self):
+        """Test the decorator is a no-op when no path is configured."""
+
+        def solver(equation_str):
+            return equation_str
+
+        assert disk_memoize(None)(solver) is solver
+
+
 class TestAPIEndpoints:
     """Test Flask API endpoints."""
 
@@ -167,12 +442,72 @@ class TestAPIEndpoints:
         data = response.get_json()
         assert "error" in data
 
+    def test_solve_response_cached_as_bytes(self, client):
+        """Test the cached body is served verbatim as JSON."""
+        response = client.get("/solve?equation=x%2B1%3D2")
+        assert response.mimetype == "application/json"
+        assert response.data == _solve_cached("x+1=2")
+
+    def test_caches_warmed(self, client):
+        """Test create_app pre-solves the warmup equations."""
+        assert _solve_cached.cache_info().currsize == len(WARMUP_EQUATIONS)
+
+    def test_evaluate_endpoint(self, client):
+        """Test batch numeric evaluation of an expression."""
+        response = client.get("/evaluate?expr=x**2%2B1&xs=0,1,2.5")
+        assert response.status_code == 200
+        assert response.get_json()["result"] == [1.0, 2.0, 7.25]
+
+    def test_evaluate_endpoint_custom_variable(self, client):
+        """Test the evaluation variable can be chosen."""
+        response = client.get("/evaluate?expr=2t&xs=3&var=t")
+        assert response.get_json()["result"] == [6.0]
+
+    def test_evaluate_endpoint_invalid_input(self, client):
+        """Test bad inputs are rejected with 400."""
+        for query in ("expr=x", "expr=x&xs=1,a", "expr=x%2By&xs=1", "expr=x%2B*2&xs=1"):
+            response = client.get(f"/evaluate?{query}")
+            assert response.status_code == 400
+            assert "error" in response.get_json()
+
+    def test_eval_endpoint(self, client):
+        """Test single-point evaluation using the expression's variable."""
+        response = client.get("/eval?expr=t**2%2B1&t=3")
+        assert response.status_code == 200
+        assert response.get_json() == {"result": 10.0}
+
+    def test_eval_endpoint_invalid_input(self, client):
+        """Test bad inputs are rejected with 400."""
+        queries = (
+            "",
+            "expr=x",
+            "expr=x&x=a",
+            "expr=x%2By&x=1",
+            "expr=x%2B*2",
+            "expr=factorial(x)&x=3",
+            "expr=x%2BI&x=1",
+            "expr=zeta(x)&x=2",
+        )
+        for query in queries:
+            response = client.get(f"/eval?{query}")
+            assert response.status_code == 400
+            assert "error" in response.get_json()
+
     def test_cors_headers(self, client):
         """Test CORS headers are set."""
         response = client.get("/")
         assert "Access-Control-Allow-Origin" in response.headers
         assert response.headers["Access-Control-Allow-Origin"] == "*"
 
+    def test_sympy_cache_cleared_periodically(self, client, monkeypatch):
+        """Test SymPy's caches are cleared every CACHE_CLEAR_INTERVAL requests."""
+        calls = []
+        monkeypatch.setattr("app.CACHE_CLEAR_INTERVAL", 2)
+        monkeypatch.setattr("app.clear_cache", lambda: calls.append(True))
+        for _ in range(5):
+            client.get("/")
+        assert len(calls) == 2
+
     def test_solve_endpoint_arithmetic(self, client):
         """Test arithmetic evaluation."""
         response = client.get("/solve?equation=10%2B5")  # %2B is URL encoding for +